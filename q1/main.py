@@ -6,6 +6,7 @@ Description: Compare base, instruct, and fine-tuned models using HuggingFace tra
 """
 
 import argparse
+import logging
 import os
 from models.model_manager import ModelManager
 from utils.report_generator import ReportGenerator
@@ -18,16 +19,32 @@ def main():
                        default='all', help='Type of models to test')
     parser.add_argument('--output', '-o', type=str, default='comparisons.md',
                        help='Output file for comparison results')
+    parser.add_argument('--compile', action='store_true',
+                       help='Compile models with torch.compile (PyTorch 2.x, slower startup)')
+    parser.add_argument('--quant', choices=['int8', 'quanto'], default=None,
+                       help='Quantize weights to int8 (int8: bitsandbytes on CUDA, quanto: optimum-quanto)')
+    parser.add_argument('--memory-budget', type=float, default=None,
+                       help='Max GB of model weights kept loaded at once (least recently used models are unloaded)')
     
     args = parser.parse_args()
     
+    # Model manager progress (including background loads) is reported through logging;
+    # only our own logger is set to INFO so library INFO logs stay quiet
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    models_log = logging.getLogger("models")
+    models_log.addHandler(handler)
+    models_log.setLevel(logging.INFO)
+    
     print("🤖 LLM Model Comparison Tool")
     print("=" * 50)
     print(f"Query: {args.query}")
     print(f"Model type: {args.model_type}")
     
     # Initialize model manager and run comparison
-    model_manager = ModelManager()
+    model_manager = ModelManager(
+        compile_models=args.compile, quant=args.quant, memory_budget_gb=args.memory_budget
+    )
     results = model_manager.compare_models(args.query, args.model_type)
     
     # Generate report
@@ -5,18 +5,65 @@ Handles loading and running different types of models using HuggingFace transfor
 
 import torch
 from transformers import (
-    AutoTokenizer, AutoModelForCausalLM, 
+    AutoTokenizer, AutoModelForCausalLM, GenerationConfig,
     pipeline, GPT2LMHeadModel, GPT2Tokenizer
 )
+import gc
+import os
+import shutil
+import tempfile
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import warnings
 warnings.filterwarnings("ignore")
 
+log = logging.getLogger(__name__)
+
+try:
+    import ctranslate2
+except ImportError:
+    ctranslate2 = None
+
+CT2_CACHE_DIR = os.path.expanduser("~/.cache/ct2")
+
+# Default generation budget, also used to warm up compiled models with the same shapes
+DEFAULT_MAX_NEW_TOKENS = 128
+
+# Allow TF32 matmuls for any float32 work on Ampere+ GPUs
+torch.backends.cuda.matmul.allow_tf32 = True
+if hasattr(torch, "set_float32_matmul_precision"):
+    torch.set_float32_matmul_precision("high")
+
 class ModelManager:
-    def __init__(self):
+    def __init__(self, compile_models=False, quant=None, memory_budget_gb=None):
         """Initialize the model manager with predefined free models"""
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {self.device}")
+        log.info(f"Using device: {self.device}")
+        
+        if self.device == "cpu":
+            torch.set_num_threads(os.cpu_count() or 1)
+            torch.backends.mkldnn.enabled = True
+        
+        # "hf" runs transformers generate(), "ct2" runs an int8 CTranslate2 conversion
+        self.backend = os.getenv("MODEL_BACKEND", "hf")
+        if self.backend == "ct2" and ctranslate2 is None:
+            log.warning("⚠️ MODEL_BACKEND=ct2 but ctranslate2 is not installed, falling back to hf")
+            self.backend = "hf"
+        
+        # Weight quantization: None, "int8" (bitsandbytes, CUDA only) or "quanto"
+        self.quant = quant
+        if self.quant == "int8" and self.device != "cuda":
+            log.warning("⚠️ int8 quantization needs CUDA (bitsandbytes), loading full-precision weights")
+            self.quant = None
+        
+        # Least recently used models are unloaded once resident weights exceed this
+        self.memory_budget = int(memory_budget_gb * 1024 ** 3) if memory_budget_gb else None
+        
+        # torch.compile needs PyTorch 2.x and only pays off on repeated decode steps
+        self.compile_models = compile_models and hasattr(torch, "compile")
         
         # Define our free model categories
         self.model_configs = {
@@ -55,35 +102,252 @@ class ModelManager:
         
         self.loaded_models = {}
         self.loaded_tokenizers = {}
+        self.loaded_generation_configs = {}
+        self.loaded_quantization = {}
+        self._tokenizers_by_vocab = {}
+        self._model_bytes = OrderedDict()  # model_name -> weight bytes, least recently used first
+        self._known_bytes = {}  # model_name -> weight bytes measured at its last load (or estimated)
+        self._pinned = set()  # models the budget must not evict (still needed by compare_models)
+        self._load_lock = threading.Lock()
     
     def load_model(self, model_name):
         """Load a model and tokenizer if not already loaded"""
         if model_name not in self.loaded_models:
-            print(f"Loading model: {model_name}...")
+            log.info(f"Loading model: {model_name}...")
             try:
                 # Load tokenizer
-                tokenizer = AutoTokenizer.from_pretrained(model_name)
+                tokenizer = self._share_tokenizer(AutoTokenizer.from_pretrained(model_name))
                 if tokenizer.pad_token is None:
                     tokenizer.pad_token = tokenizer.eos_token
                 
+                if self.backend == "ct2":
+                    generator = self._load_ct2_generator(model_name)
+                    with self._load_lock:
+                        self.loaded_models[model_name] = generator
+                        self.loaded_tokenizers[model_name] = tokenizer
+                        self.loaded_quantization[model_name] = f"ctranslate2 {self._ct2_compute_type()}"
+                    log.info(f"✅ Loaded {model_name} (ctranslate2)")
+                    return self.loaded_models[model_name], tokenizer
+                
+                # Make room first, using the size recorded the last time this model loaded,
+                # so the budget also bounds the peak while the new weights come in
+                with self._load_lock:
+                    evicted = self._evict_over_budget(incoming=self._known_bytes.get(model_name, 0))
+                if evicted:
+                    log.info(f"♻️ Unloaded {', '.join(evicted)} to make room for {model_name}")
+                    self._release_memory()
+                
                 # Load model
-                model = AutoModelForCausalLM.from_pretrained(
-                    model_name,
-                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
-                    device_map="auto" if self.device == "cuda" else None
+                # Stream weights straight to their target device instead of building
+                # a full CPU copy first; safetensors checkpoints are used when present
+                model_kwargs = {
+                    'torch_dtype': torch.float16 if self.device == "cuda" else torch.float32,
+                    'device_map': "auto" if self.device == "cuda" else {"": "cpu"},
+                    'low_cpu_mem_usage': True
+                }
+                if self.quant == "int8":
+                    from transformers import BitsAndBytesConfig
+                    model_kwargs['quantization_config'] = BitsAndBytesConfig(
+                        load_in_8bit=True, llm_int8_threshold=6.0
+                    )
+                try:
+                    # Fused scaled-dot-product attention (transformers >= 4.36)
+                    model = AutoModelForCausalLM.from_pretrained(
+                        model_name, attn_implementation="sdpa", **model_kwargs
+                    )
+                except (TypeError, ValueError, ImportError):
+                    model = AutoModelForCausalLM.from_pretrained(model_name, **model_kwargs)
+                model.eval()
+                model.config.use_cache = True
+                
+                if self.quant == "quanto":
+                    from optimum.quanto import quantize, freeze, qint8
+                    quantize(model, weights=qint8)
+                    freeze(model)
+                
+                # Build the sampling config once so generate() doesn't rebuild it per call
+                generation_config = GenerationConfig.from_model_config(model.config)
+                generation_config.update(
+                    num_return_sequences=1,
+                    temperature=0.7,
+                    do_sample=True,
+                    use_cache=True,
+                    pad_token_id=tokenizer.eos_token_id
                 )
                 
-                self.loaded_models[model_name] = model
-                self.loaded_tokenizers[model_name] = tokenizer
-                print(f"✅ Loaded {model_name}")
+                if self.compile_models:
+                    self._compile_model(model, tokenizer, generation_config)
+                
+                with self._load_lock:
+                    self.loaded_models[model_name] = model
+                    self.loaded_tokenizers[model_name] = tokenizer
+                    self.loaded_generation_configs[model_name] = generation_config
+                    self.loaded_quantization[model_name] = self.quant or str(model.dtype).replace("torch.", "")
+                    self._model_bytes[model_name] = self._known_bytes[model_name] = sum(
+                        p.numel() * p.element_size() for p in model.parameters()
+                    )
+                    evicted = self._evict_over_budget(keep=model_name)
+                log.info(f"✅ Loaded {model_name}")
+                
+                if self.memory_budget is not None and self._known_bytes[model_name] > self.memory_budget:
+                    log.warning(
+                        f"⚠️ {model_name} needs {self._known_bytes[model_name] / 1024 ** 3:.2f} GB, "
+                        f"more than the {self.memory_budget / 1024 ** 3:.2f} GB memory budget"
+                    )
+                
+                if evicted:
+                    log.info(f"♻️ Unloaded {', '.join(evicted)} to stay within the memory budget")
+                    self._release_memory()
                 
             except Exception as e:
-                print(f"❌ Failed to load {model_name}: {str(e)}")
+                log.error(f"❌ Failed to load {model_name}: {str(e)}")
                 return None
         
         return self.loaded_models.get(model_name), self.loaded_tokenizers.get(model_name)
     
-    def generate_response(self, model_name, query, max_length=150):
+    def unload_model(self, model_name):
+        """Unload a model and free the memory it was using"""
+        with self._load_lock:
+            self._drop_model(model_name)
+        self._release_memory()
+    
+    def _drop_model(self, model_name):
+        """Forget a loaded model (caller holds the load lock)"""
+        self.loaded_models.pop(model_name, None)
+        self.loaded_tokenizers.pop(model_name, None)
+        self.loaded_generation_configs.pop(model_name, None)
+        self.loaded_quantization.pop(model_name, None)
+        self._model_bytes.pop(model_name, None)
+    
+    def _evict_over_budget(self, keep=None, incoming=0):
+        """Drop least recently used models until they and `incoming` bytes fit the memory budget (caller holds the load lock)"""
+        evicted = []
+        if self.memory_budget is None:
+            return evicted
+        
+        for name in list(self._model_bytes):
+            if sum(self._model_bytes.values()) + incoming <= self.memory_budget:
+                break
+            if name != keep and name not in self._pinned:
+                self._drop_model(name)
+                evicted.append(name)
+        return evicted
+    
+    def _estimated_bytes(self, model_name):
+        """Weight bytes a model takes once loaded, from its last load or the hub's safetensors metadata (None if unknown)"""
+        if model_name not in self._known_bytes:
+            try:
+                from huggingface_hub import get_safetensors_metadata
+                parameter_count = sum(get_safetensors_metadata(model_name).parameter_count.values())
+            except Exception:
+                return None
+            if self.quant:
+                bytes_per_param = 1
+            else:
+                bytes_per_param = 2 if self.device == "cuda" else 4
+            with self._load_lock:
+                self._known_bytes.setdefault(model_name, parameter_count * bytes_per_param)
+        return self._known_bytes[model_name]
+    
+    def _prefetch_fits(self, model_name, in_use):
+        """Whether loading a model alongside the models still in use stays within the memory budget"""
+        if self.memory_budget is None:
+            return True
+        sizes = [self._estimated_bytes(name) for name in (*in_use, model_name)]
+        return None not in sizes and sum(sizes) <= self.memory_budget
+    
+    def _release_memory(self):
+        """Return freed model memory to the system / CUDA allocator"""
+        gc.collect()
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+    
+    def _share_tokenizer(self, tokenizer):
+        """Return an already-loaded tokenizer with the same vocabulary and settings, if there is one"""
+        # All the GPT-2 variants share one BPE vocab, so a few sampled tokens identify it;
+        # len() counts added tokens, and special tokens and padding settings must match too
+        vocab_size = tokenizer.vocab_size
+        key = (
+            type(tokenizer).__name__,
+            vocab_size,
+            len(tokenizer),
+            tuple(tokenizer.convert_ids_to_tokens([0, 1, vocab_size // 2, vocab_size - 1])),
+            tuple(sorted((name, str(token)) for name, token in tokenizer.special_tokens_map.items())),
+            tokenizer.model_max_length,
+            tokenizer.padding_side
+        )
+        with self._load_lock:
+            return self._tokenizers_by_vocab.setdefault(key, tokenizer)
+    
+    def _ct2_compute_type(self):
+        """CTranslate2 weight type for the current device"""
+        return "int8_float16" if self.device == "cuda" else "int8"
+    
+    def _load_ct2_generator(self, model_name):
+        """Convert a HF model to CTranslate2 format (cached on disk) and load it"""
+        output_dir = os.path.join(CT2_CACHE_DIR, model_name.replace("/", "--"))
+        compute_type = self._ct2_compute_type()
+        
+        if not os.path.isdir(output_dir):
+            log.info(f"Converting {model_name} to CTranslate2 format...")
+            # Convert into a temporary directory and move it into place, so an
+            # interrupted conversion never leaves a half-written model behind
+            os.makedirs(CT2_CACHE_DIR, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(dir=CT2_CACHE_DIR, suffix=".tmp")
+            try:
+                converter = ctranslate2.converters.TransformersConverter(model_name)
+                converter.convert(output_dir=tmp_dir, quantization=compute_type, force=True)
+                try:
+                    os.replace(tmp_dir, output_dir)
+                except OSError:
+                    # Another process finished converting first; keep its copy
+                    if not os.path.isdir(output_dir):
+                        raise
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        return ctranslate2.Generator(output_dir, device=self.device, compute_type=compute_type)
+    
+    def _generate_ct2(self, generator, tokenizer, query, max_new_tokens, min_new_tokens):
+        """Generate with a CTranslate2 generator, returning only the newly generated ids"""
+        input_ids = tokenizer(query)["input_ids"]
+        results = generator.generate_batch(
+            [tokenizer.convert_ids_to_tokens(input_ids)],
+            max_length=max_new_tokens,
+            min_length=min_new_tokens,
+            sampling_topk=50,
+            sampling_temperature=0.7,
+            include_prompt_in_result=False
+        )
+        return results[0].sequences_ids[0]
+    
+    def _compile_model(self, model, tokenizer, generation_config):
+        """Compile the model's forward pass and pay the compile cost with a warm-up run"""
+        log.info("Compiling model (first run may take a minute)...")
+        torch._inductor.config.fx_graph_cache = True
+        if self.device == "cuda":
+            # A KV cache preallocated to the full context window keeps its shape the same
+            # for every query, so CUDA graphs are captured once instead of recompiling as
+            # the cache grows or when a longer prompt would resize it; dynamic shapes
+            # cover prompts of different lengths
+            generation_config.cache_implementation = "static"
+            generation_config.max_cache_len = model.config.max_position_embeddings
+            model.forward = torch.compile(model.forward, mode="reduce-overhead", dynamic=True)
+        else:
+            # CUDA graphs don't apply on CPU; compile with dynamic shapes so the
+            # growing KV cache doesn't trigger a recompile per decode step
+            model.forward = torch.compile(model.forward, dynamic=True)
+        
+        # Warm up with the real generation budget so every decode step has been compiled
+        warmup = tokenizer("Hello", return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            model.generate(
+                **warmup,
+                generation_config=generation_config,
+                max_new_tokens=DEFAULT_MAX_NEW_TOKENS
+            )
+    
+    def generate_response(self, model_name, query, max_new_tokens=DEFAULT_MAX_NEW_TOKENS, min_new_tokens=8):
         """Generate response from a specific model"""
         load_result = self.load_model(model_name)
         if load_result is None:
@@ -93,22 +357,39 @@ class ModelManager:
         if model is None or tokenizer is None:
             return "Error: Could not load model"
         
+        with self._load_lock:
+            if model_name in self._model_bytes:
+                self._model_bytes.move_to_end(model_name)
+        
         try:
+            if self.backend == "ct2":
+                start_time = time.time()
+                output_ids = self._generate_ct2(
+                    model, tokenizer, query, max_new_tokens, min_new_tokens
+                )
+                generation_time = time.time() - start_time
+                
+                return {
+                    'response': tokenizer.decode(output_ids, skip_special_tokens=True).strip(),
+                    'generation_time': round(generation_time, 2),
+                    'tokens_generated': len(output_ids),
+                    'weights': self.loaded_quantization.get(model_name)
+                }
+            
             # Tokenize input
-            inputs = tokenizer.encode(query, return_tensors="pt")
+            inputs = tokenizer(query, return_tensors="pt", return_attention_mask=True)
             if self.device == "cuda":
-                inputs = inputs.to(self.device)
+                inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
+            prompt_length = inputs['input_ids'].shape[1]
             
             # Generate response
             start_time = time.time()
-            with torch.no_grad():
+            with torch.inference_mode():
                 outputs = model.generate(
-                    inputs,
-                    max_length=max_length,
-                    num_return_sequences=1,
-                    temperature=0.7,
-                    do_sample=True,
-                    pad_token_id=tokenizer.eos_token_id
+                    **inputs,
+                    generation_config=self.loaded_generation_configs[model_name],
+                    max_new_tokens=max_new_tokens,
+                    min_new_tokens=min_new_tokens
                 )
             
             generation_time = time.time() - start_time
@@ -123,7 +404,8 @@ class ModelManager:
             return {
                 'response': response,
                 'generation_time': round(generation_time, 2),
-                'tokens_generated': len(outputs[0]) - len(inputs[0])
+                'tokens_generated': len(outputs[0]) - prompt_length,
+                'weights': self.loaded_quantization.get(model_name)
             }
             
         except Exception as e:
@@ -139,19 +421,64 @@ class ModelManager:
         
         types_to_test = [model_type] if model_type != 'all' else ['base', 'instruct', 'fine-tuned']
         
+        unique_model_names = list(dict.fromkeys(
+            config['model_name']
+            for mtype in types_to_test if mtype in self.model_configs
+            for config in self.model_configs[mtype].values()
+        ))
+        
+        # Models load in the background in comparison order, so generation for each
+        # model starts as soon as it is ready while the next ones are still loading.
+        # Each distinct model is loaded once and reused by every entry pointing at it.
+        # Loading is mostly disk I/O and device copies, which release the GIL.
+        # With a memory budget a model is only prefetched while it fits alongside the
+        # models still in use; unknown sizes wait until the previous model is done.
+        prefetch_depth = 4
+        remaining_uses = {name: 0 for name in unique_model_names}
         for mtype in types_to_test:
-            if mtype in self.model_configs:
-                results['comparisons'][mtype] = {}
-                
-                for model_key, config in self.model_configs[mtype].items():
-                    print(f"\n🔄 Testing {mtype} model: {model_key}")
-                    
-                    response_data = self.generate_response(config['model_name'], query)
+            for config in self.model_configs.get(mtype, {}).values():
+                remaining_uses[config['model_name']] += 1
+        
+        # Models that later entries still need are never evicted by the budget;
+        # each is unpinned after its last use below
+        with self._load_lock:
+            self._pinned = set(unique_model_names)
+        
+        with ThreadPoolExecutor(max_workers=prefetch_depth) as executor:
+            load_futures = {}
+            
+            for mtype in types_to_test:
+                if mtype in self.model_configs:
+                    results['comparisons'][mtype] = {}
                     
-                    results['comparisons'][mtype][model_key] = {
-                        'config': config,
-                        'response_data': response_data
-                    }
+                    for model_key, config in self.model_configs[mtype].items():
+                        log.info(f"\n🔄 Testing {mtype} model: {model_key}")
+                        
+                        model_name = config['model_name']
+                        position = unique_model_names.index(model_name)
+                        if model_name not in load_futures:
+                            load_futures[model_name] = executor.submit(self.load_model, model_name)
+                        for name in unique_model_names[position + 1:position + prefetch_depth + 1]:
+                            if name not in load_futures:
+                                in_use = [n for n in load_futures if remaining_uses[n] > 0]
+                                if not self._prefetch_fits(name, in_use):
+                                    break
+                                load_futures[name] = executor.submit(self.load_model, name)
+                        
+                        load_futures[model_name].result()
+                        response_data = self.generate_response(model_name, query)
+                        
+                        # Free the model as soon as no remaining entry needs it
+                        remaining_uses[model_name] -= 1
+                        if remaining_uses[model_name] == 0:
+                            with self._load_lock:
+                                self._pinned.discard(model_name)
+                            self.unload_model(model_name)
+                        
+                        results['comparisons'][mtype][model_key] = {
+                            'config': config,
+                            'response_data': response_data
+                        }
         
         return results
     
@@ -106,7 +106,10 @@ class ReportGenerator:
                 
                 if isinstance(response_data, dict):
                     analysis += f"**Full Response:**\n```\n{response_data['response']}\n```\n\n"
-                    analysis += f"**Performance:** {response_data['generation_time']} seconds\n\n"
+                    analysis += f"**Performance:** {response_data['generation_time']} seconds"
+                    if response_data.get('weights'):
+                        analysis += f" ({response_data['weights']} weights)"
+                    analysis += "\n\n"
                 else:
                     analysis += f"**Error:** {response_data}\n\n"
         
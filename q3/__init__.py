@@ -0,0 +1,4 @@
+"""
+Tool-enhanced reasoning script.
+Combines Gemini chain-of-thought reasoning with math and string tools.
+"""
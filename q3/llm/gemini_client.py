@@ -4,11 +4,78 @@ Adapted from q2's vision implementation for text-only reasoning tasks.
 """
 
 import os
+import re
 import json
 import asyncio
+import hashlib
+import tempfile
+import threading
 import aiohttp
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass, asdict
+
+
+# Matches the three sections of the structured response in order; markers only count at
+# the start of a line, so a marker mentioned inside a section doesn't split it
+_SECTION_RE = re.compile(
+    r"^[^\S\n]*REASONING:\s*(?P<r>.*?)\s*"
+    r"^[^\S\n]*TOOLS_NEEDED:\s*(?P<t>.*?)\s*"
+    r"^[^\S\n]*FINAL_ANSWER:\s*(?P<a>.*)",
+    re.DOTALL | re.MULTILINE
+)
+
+
+def _join_lines(text: str) -> str:
+    """Collapse a multi-line section into a single line."""
+    return ' '.join(line.strip() for line in text.split('\n') if line.strip())
+
+
+# The reasoning prompt is constant apart from the query, so it is built once at import
+_PROMPT_PREFIX = """You are a helpful assistant that can solve problems step-by-step and use tools when needed.
+
+Available tools:
+- calculate_average(numbers): Calculate average of a list of numbers
+- square_root(number): Calculate square root of a number  
+- basic_calculator(expression): Evaluate mathematical expressions
+- compare_numbers(a, b, operator): Compare two numbers (>, <, >=, <=, ==, !=)
+- count_vowels(text): Count vowels in text
+- count_letters(text): Count letters in text
+- count_consonants(text): Count consonants in text
+- analyze_string(text): Get comprehensive text analysis
+
+For the query: \""""
+_PROMPT_SUFFIX = """\"
+
+Please provide your response in this exact format:
+
+REASONING:
+[Provide step-by-step reasoning about how to solve this problem]
+
+TOOLS_NEEDED:
+[If tools are needed, list them as: function_name(parameters). If no tools needed, write "none"]
+
+FINAL_ANSWER:
+[Provide the final answer or indicate that tools need to be executed first]
+
+Remember:
+- Break down complex problems into steps
+- Identify when calculations or text analysis are needed
+- Use specific tool calls with exact parameters
+- Be precise about what tools are required
+"""
+
+_GENERATION_CONFIG = {
+    "temperature": 0.1,  # Low temperature for consistent reasoning
+    "candidateCount": 1,
+    "maxOutputTokens": 1000
+}
+
+# Cache keys hash the endpoint and query; this version tag invalidates them when the
+# template or generation settings change
+_PROMPT_VERSION = hashlib.sha256(
+    (_PROMPT_PREFIX + _PROMPT_SUFFIX + json.dumps(_GENERATION_CONFIG, sort_keys=True)).encode('utf-8')
+).hexdigest()[:12]
 
 
 @dataclass
@@ -40,6 +107,19 @@ class GeminiReasoningClient:
             raise ValueError("Gemini API key not found. Set GEMINI_API_KEY environment variable.")
         
         self.base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+        
+        # Parsed responses are cached on disk, keyed by endpoint and query; an empty
+        # GEMINI_CACHE_DIR turns the cache off
+        cache_dir = os.getenv('GEMINI_CACHE_DIR', '~/.cache/gemini')
+        self.cache_dir: Optional[Path] = Path(cache_dir).expanduser() if cache_dir else None
+        
+        # Shared HTTP session so keep-alive connections are reused across calls; it lives
+        # on the background loop below, whichever loop the caller runs on
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Background event loop used by the sync reason() wrapper; started on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
     
     def create_reasoning_prompt(self, query: str) -> str:
         """
@@ -52,38 +132,52 @@ class GeminiReasoningClient:
         Returns:
             str: Structured prompt for Gemini
         """
-        prompt = f"""You are a helpful assistant that can solve problems step-by-step and use tools when needed.
-
-Available tools:
-- calculate_average(numbers): Calculate average of a list of numbers
-- square_root(number): Calculate square root of a number  
-- basic_calculator(expression): Evaluate mathematical expressions
-- compare_numbers(a, b, operator): Compare two numbers (>, <, >=, <=, ==, !=)
-- count_vowels(text): Count vowels in text
-- count_letters(text): Count letters in text
-- count_consonants(text): Count consonants in text
-- analyze_string(text): Get comprehensive text analysis
-
-For the query: "{query}"
-
-Please provide your response in this exact format:
-
-REASONING:
-[Provide step-by-step reasoning about how to solve this problem]
-
-TOOLS_NEEDED:
-[If tools are needed, list them as: function_name(parameters). If no tools needed, write "none"]
-
-FINAL_ANSWER:
-[Provide the final answer or indicate that tools need to be executed first]
-
-Remember:
-- Break down complex problems into steps
-- Identify when calculations or text analysis are needed
-- Use specific tool calls with exact parameters
-- Be precise about what tools are required
-"""
-        return prompt
+        return f"{_PROMPT_PREFIX}{query}{_PROMPT_SUFFIX}"
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use. Only call this on the background loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300, keepalive_timeout=60)
+            )
+        return self._session
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP session."""
+        loop = self._loop
+        if loop is not None and asyncio.get_running_loop() is not loop:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.aclose(), loop))
+            return
+        
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the background event loop, starting its thread on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            return self._loop
+    
+    def close(self) -> None:
+        """Close the HTTP session and stop the background event loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+        
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=5)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     
     async def call_reasoning_api(self, prompt: str) -> Dict[str, Any]:
         """
@@ -105,29 +199,33 @@ Remember:
                     ]
                 }
             ],
-            "generationConfig": {
-                "temperature": 0.1,  # Low temperature for consistent reasoning
-                "candidateCount": 1,
-                "maxOutputTokens": 1000
-            }
+            "generationConfig": _GENERATION_CONFIG
         }
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                    f"{self.base_url}?key={self.api_key}",
-                    headers={'Content-Type': 'application/json'},
-                    json=request_body
-                ) as response:
-                    
-                    if not response.ok:
-                        error_text = await response.text()
-                        raise Exception(f"Gemini API error {response.status}: {error_text}")
-                    
-                    return await response.json()
-                    
-            except Exception as e:
-                raise Exception(f"Failed to call Gemini API: {str(e)}")
+        # The shared session is bound to the background loop, so calls made from any
+        # other loop (e.g. asyncio.run) are handed over to it
+        loop = self._get_loop()
+        if asyncio.get_running_loop() is not loop:
+            return await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self.call_reasoning_api(prompt), loop)
+            )
+        
+        session = await self._get_session()
+        try:
+            async with session.post(
+                f"{self.base_url}?key={self.api_key}",
+                headers={'Content-Type': 'application/json'},
+                json=request_body
+            ) as response:
+                
+                if not response.ok:
+                    error_text = await response.text()
+                    raise Exception(f"Gemini API error {response.status}: {error_text}")
+                
+                return await response.json()
+                
+        except Exception as e:
+            raise Exception(f"Failed to call Gemini API: {str(e)}")
     
     def parse_reasoning_response(self, raw_response: str) -> ReasoningResponse:
         """
@@ -140,40 +238,20 @@ Remember:
             ReasoningResponse: Parsed response components
         """
         try:
-            # Initialize default values
-            reasoning = ""
-            tools_needed = "none"
-            final_answer = ""
-            
-            # Split response into sections
-            sections = raw_response.split('\n\n')
-            current_section = None
-            
-            for line in raw_response.split('\n'):
-                line = line.strip()
-                
-                if line.startswith('REASONING:'):
-                    current_section = 'reasoning'
-                    reasoning = line.replace('REASONING:', '').strip()
-                elif line.startswith('TOOLS_NEEDED:'):
-                    current_section = 'tools'
-                    tools_needed = line.replace('TOOLS_NEEDED:', '').strip()
-                elif line.startswith('FINAL_ANSWER:'):
-                    current_section = 'answer'
-                    final_answer = line.replace('FINAL_ANSWER:', '').strip()
-                elif current_section and line:
-                    if current_section == 'reasoning':
-                        reasoning += ' ' + line
-                    elif current_section == 'tools':
-                        tools_needed += ' ' + line
-                    elif current_section == 'answer':
-                        final_answer += ' ' + line
+            match = _SECTION_RE.search(raw_response)
+            if match:
+                reasoning = _join_lines(match.group('r'))
+                tools_needed = _join_lines(match.group('t'))
+                final_answer = _join_lines(match.group('a'))
+            else:
+                # Sections missing or out of order - fall back to line-by-line scanning
+                reasoning, tools_needed, final_answer = self._parse_sections_by_line(raw_response)
             
             return ReasoningResponse(
                 success=True,
-                reasoning=reasoning.strip(),
-                tools_needed=tools_needed.strip(),
-                final_answer=final_answer.strip(),
+                reasoning=reasoning,
+                tools_needed=tools_needed,
+                final_answer=final_answer,
                 raw_response=raw_response
             )
             
@@ -184,6 +262,77 @@ Remember:
                 raw_response=raw_response
             )
     
+    @staticmethod
+    def _parse_sections_by_line(raw_response: str) -> Tuple[str, str, str]:
+        """
+        Parse whichever sections are present by scanning line by line.
+        
+        Args:
+            raw_response: Raw text response from Gemini
+            
+        Returns:
+            Tuple of (reasoning, tools_needed, final_answer)
+        """
+        sections = {'reasoning': [], 'tools': ['none'], 'answer': []}
+        current_section = None
+        
+        for line in raw_response.split('\n'):
+            line = line.strip()
+            
+            if line.startswith('REASONING:'):
+                current_section = 'reasoning'
+                sections[current_section] = [line[len('REASONING:'):]]
+            elif line.startswith('TOOLS_NEEDED:'):
+                current_section = 'tools'
+                sections[current_section] = [line[len('TOOLS_NEEDED:'):]]
+            elif line.startswith('FINAL_ANSWER:'):
+                current_section = 'answer'
+                sections[current_section] = [line[len('FINAL_ANSWER:'):]]
+            elif current_section and line:
+                sections[current_section].append(line)
+        
+        return tuple(_join_lines('\n'.join(sections[key])) for key in ('reasoning', 'tools', 'answer'))
+    
+    def _cache_path(self, query: str) -> Path:
+        """Get the cache file path for a query."""
+        key = hashlib.sha256(f"{self.base_url}\n{query}".encode('utf-8')).hexdigest()
+        return self.cache_dir / _PROMPT_VERSION / f"{key}.json"
+    
+    def _read_cache(self, query: str) -> Optional[ReasoningResponse]:
+        """
+        Load a cached response for a query.
+        
+        Args:
+            query: Natural language query
+            
+        Returns:
+            ReasoningResponse if cached, otherwise None
+        """
+        try:
+            with open(self._cache_path(query), 'r', encoding='utf-8') as f:
+                return ReasoningResponse(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+    
+    def _write_cache(self, query: str, response: ReasoningResponse) -> None:
+        """
+        Store a response in the cache, writing atomically so readers never see partial files.
+        
+        Args:
+            query: Natural language query
+            response: Successfully parsed response
+        """
+        try:
+            cache_path = self._cache_path(query)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(asdict(response), f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # Caching is best-effort
+            pass
+    
     async def reason_async(self, query: str) -> ReasoningResponse:
         """
         Async method to get reasoning response for a query.
@@ -195,6 +344,12 @@ Remember:
             ReasoningResponse: Parsed reasoning response
         """
         try:
+            # Serve repeated queries from the disk cache
+            if self.cache_dir is not None:
+                cached = await asyncio.to_thread(self._read_cache, query)
+                if cached is not None:
+                    return cached
+            
             # Create structured prompt
             prompt = self.create_reasoning_prompt(query)
             
@@ -211,7 +366,10 @@ Remember:
                 raw_text = api_response['candidates'][0]['content']['parts'][0]['text']
                 
                 # Parse the structured response
-                return self.parse_reasoning_response(raw_text)
+                parsed = self.parse_reasoning_response(raw_text)
+                if parsed.success and self.cache_dir is not None:
+                    await asyncio.to_thread(self._write_cache, query, parsed)
+                return parsed
             else:
                 return ReasoningResponse(
                     success=False,
@@ -235,13 +393,9 @@ Remember:
             ReasoningResponse: Parsed reasoning response
         """
         try:
-            # Run async function in sync context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(self.reason_async(query))
-            finally:
-                loop.close()
+            # Run on the long-lived background loop so the session's connections stay warm
+            future = asyncio.run_coroutine_threadsafe(self.reason_async(query), self._get_loop())
+            return future.result()
         except Exception as e:
             return ReasoningResponse(
                 success=False,
@@ -57,8 +57,25 @@ class ToolEnhancedReasoning:
             print(f"Query: {query}")
             print("-" * 50)
         
-        # Step 1: Get initial reasoning from LLM
-        reasoning_response = self.llm_client.reason(query)
+        # Step 1: Run tools that are obvious from the query itself, so their results
+        # can go into the first LLM call instead of needing a follow-up round trip
+        precomputed_calls = self.tool_router.detect_tool_calls(query)
+        precomputed_results = self.tool_router.execute_all_tools(precomputed_calls) if precomputed_calls else {}
+        
+        if any(result.success for result in precomputed_results.values()):
+            if verbose:
+                print(f"\n⚡ Precomputed {len(precomputed_calls)} tool(s) from the query")
+            
+            llm_query = ChainOfThoughtPrompt.create_precomputed_prompt(
+                query, self._tool_results_dict(precomputed_results)
+            )
+        else:
+            precomputed_calls = []
+            precomputed_results = {}
+            llm_query = query
+        
+        # Step 2: Get reasoning from LLM
+        reasoning_response = self.llm_client.reason(llm_query)
         
         if not reasoning_response.success:
             return {
@@ -72,36 +89,33 @@ class ToolEnhancedReasoning:
             print(reasoning_response.reasoning)
             print(f"\n🔧 Tools Needed: {reasoning_response.tools_needed}")
         
-        # Step 2: Parse and execute tools if needed
+        # Step 3: Parse and execute any tools the LLM still needs
         tool_calls = self.tool_router.parse_tools_from_response(reasoning_response.raw_response)
-        tool_results = {}
+        already_run = {call.signature() for call in precomputed_calls}
+        remaining_calls = [call for call in tool_calls if call.signature() not in already_run]
         
-        if tool_calls:
+        if remaining_calls:
             if verbose:
-                print(f"\n⚡ Executing {len(tool_calls)} tool(s)...")
+                print(f"\n⚡ Executing {len(remaining_calls)} tool(s)...")
             
-            tool_results = self.tool_router.execute_all_tools(tool_calls)
-            
-            if verbose:
-                for tool_name, result in tool_results.items():
-                    if result.success:
-                        print(f"  ✅ {tool_name}: {result.result}")
-                    else:
-                        print(f"  ❌ {tool_name}: {result.error}")
+            tool_results = self.tool_router.execute_all_tools(precomputed_calls + remaining_calls)
+        else:
+            tool_results = precomputed_results
+        
+        if verbose:
+            for tool_name, result in tool_results.items():
+                if result.success:
+                    print(f"  ✅ {tool_name}: {result.result}")
+                else:
+                    print(f"  ❌ {tool_name}: {result.error}")
         
-        # Step 3: Determine final answer
+        # Step 4: Determine final answer
         final_answer = reasoning_response.final_answer
         
-        # If tools were executed and we need to combine results
-        if tool_results and any(result.success for result in tool_results.values()):
-            # Create a follow-up prompt to get final answer with tool results
-            tool_results_dict = {
-                name: result.result if result.success else f"Error: {result.error}"
-                for name, result in tool_results.items()
-            }
-            
+        # Only make a follow-up call if the LLM asked for tools it hasn't seen results for
+        if remaining_calls and any(result.success for result in tool_results.values()):
             follow_up_prompt = ChainOfThoughtPrompt.create_follow_up_prompt(
-                query, reasoning_response.reasoning, tool_results_dict
+                query, reasoning_response.reasoning, self._tool_results_dict(tool_results)
             )
             
             # Get final answer incorporating tool results
@@ -114,15 +128,20 @@ class ToolEnhancedReasoning:
             'query': query,
             'reasoning': reasoning_response.reasoning,
             'tools_needed': reasoning_response.tools_needed,
-            'tools_used': len(tool_calls) > 0,
-            'tool_results': {
-                name: result.result if result.success else f"Error: {result.error}"
-                for name, result in tool_results.items()
-            },
+            'tools_used': len(tool_results) > 0,
+            'tool_results': self._tool_results_dict(tool_results),
             'final_answer': final_answer,
             'raw_llm_response': reasoning_response.raw_response
         }
     
+    @staticmethod
+    def _tool_results_dict(tool_results: Dict[str, ToolResult]) -> Dict[str, Any]:
+        """Map tool result keys to their values, or error messages for failed tools."""
+        return {
+            name: result.result if result.success else f"Error: {result.error}"
+            for name, result in tool_results.items()
+        }
+    
     def format_output(self, result: Dict[str, Any], show_reasoning: bool = True) -> str:
         """
         Format the reasoning result for display.
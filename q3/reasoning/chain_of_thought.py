@@ -3,11 +3,91 @@ Chain-of-thought prompting utilities and templates.
 Provides structured prompts to guide LLM reasoning.
 """
 
-from typing import List, Dict, Any
+import re
+import sys
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Tuple
 from dataclasses import dataclass
 
 
-@dataclass
+# Instructions and format spec come first so every request shares the same prompt prefix;
+# only the tool list and task that follow change between requests
+_STRUCTURED_PREFIX = """You are an expert problem solver that uses systematic reasoning and external tools when needed.
+
+Solve the task at the end step-by-step using the following format:
+
+REASONING:
+1. [Break down the problem into logical steps]
+2. [Identify what information or calculations are needed]
+3. [Determine if any tools are required and why]
+4. [Plan the sequence of operations]
+
+TOOLS_NEEDED:
+[List specific tool calls needed, or "none" if no tools required]
+Format: function_name(parameter1, parameter2, ...)
+
+FINAL_ANSWER:
+[Provide final answer or indicate tools need to be executed first]
+
+Guidelines:
+- Think step by step before jumping to conclusions
+- Use tools for any calculations or text analysis
+- Be explicit about your reasoning process
+- Provide specific parameters for tool calls
+
+"""
+
+_STRUCTURED_SUFFIX = """AVAILABLE TOOLS:
+{tools}
+
+TASK: {query}
+"""
+
+_TOOL_LINE_FMT = "- {tool}"
+
+# Section markers of a structured response, in the order they appear
+REASONING_MARKER = sys.intern('REASONING:')
+TOOLS_NEEDED_MARKER = sys.intern('TOOLS_NEEDED:')
+FINAL_ANSWER_MARKER = sys.intern('FINAL_ANSWER:')
+_SECTIONS = (REASONING_MARKER, TOOLS_NEEDED_MARKER, FINAL_ANSWER_MARKER)
+
+# The three sections in order, with markers recognised only at the start of a line
+_SECTIONS_RE = re.compile(
+    rf"^[^\S\n]*{REASONING_MARKER}(?P<reasoning>.*?)"
+    rf"^[^\S\n]*{TOOLS_NEEDED_MARKER}(?P<tools_needed>.*?)"
+    rf"^[^\S\n]*{FINAL_ANSWER_MARKER}(?P<final_answer>.*)",
+    re.DOTALL | re.MULTILINE
+)
+
+# Constant pieces of the follow-up prompt, joined around the per-request values
+_FOLLOW_UP_QUERY = "Original query: "
+_FOLLOW_UP_REASONING = "\n\nPrevious reasoning:\n"
+_FOLLOW_UP_RESULTS = "\n\nTool execution results:\n"
+_FOLLOW_UP_SUFFIX = """
+
+Now provide the final answer based on your reasoning and the tool results:
+
+FINAL_ANSWER:
+[Combine your reasoning with tool results to provide the complete answer]
+"""
+
+
+def _join_lines(text: str) -> str:
+    """Collapse a multi-line section into a single line."""
+    return ' '.join(line.strip() for line in text.split('\n') if line.strip())
+
+
+@lru_cache(maxsize=32)
+def _render_tools_section(tools: Tuple[str, ...]) -> str:
+    """Render a sorted tool list; the same tool set always yields the same bytes."""
+    return "\n".join(_TOOL_LINE_FMT.format(tool=tool) for tool in tools)
+
+
+# Slotted dataclasses (Python 3.10+) drop the per-instance __dict__
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class ReasoningStep:
     """Single step in chain-of-thought reasoning"""
     step_number: int
@@ -35,37 +115,26 @@ class ChainOfThoughtPrompt:
         Returns:
             str: Formatted prompt for chain-of-thought reasoning
         """
-        tools_section = "\n".join([f"- {tool}" for tool in available_tools])
+        prefix, suffix = ChainOfThoughtPrompt.create_structured_prompt_parts(query, available_tools)
+        return prefix + suffix
+    
+    @staticmethod
+    def create_structured_prompt_parts(query: str, available_tools: List[str]) -> Tuple[str, str]:
+        """
+        Split the structured prompt into its constant prefix and per-request suffix.
         
-        prompt = f"""You are an expert problem solver that uses systematic reasoning and external tools when needed.
-
-AVAILABLE TOOLS:
-{tools_section}
-
-TASK: {query}
-
-Please solve this step-by-step using the following format:
-
-REASONING:
-1. [Break down the problem into logical steps]
-2. [Identify what information or calculations are needed]
-3. [Determine if any tools are required and why]
-4. [Plan the sequence of operations]
-
-TOOLS_NEEDED:
-[List specific tool calls needed, or "none" if no tools required]
-Format: function_name(parameter1, parameter2, ...)
-
-FINAL_ANSWER:
-[Provide final answer or indicate tools need to be executed first]
-
-Guidelines:
-- Think step by step before jumping to conclusions
-- Use tools for any calculations or text analysis
-- Be explicit about your reasoning process
-- Provide specific parameters for tool calls
-"""
-        return prompt
+        The prefix is byte-identical for every request, so callers can mark the
+        boundary for provider-side prompt caching.
+        
+        Args:
+            query: User's natural language query
+            available_tools: List of available tool names and descriptions
+            
+        Returns:
+            Tuple of (stable prefix, dynamic suffix)
+        """
+        tools_section = _render_tools_section(tuple(sorted(available_tools)))
+        return _STRUCTURED_PREFIX, _STRUCTURED_SUFFIX.format(tools=tools_section, query=query)
     
     @staticmethod
     def create_follow_up_prompt(query: str, previous_reasoning: str, tool_results: Dict[str, Any]) -> str:
@@ -84,19 +153,36 @@ Guidelines:
             f"- {tool}: {result}" for tool, result in tool_results.items()
         ])
         
-        prompt = f"""Original query: {query}
-
-Previous reasoning:
-{previous_reasoning}
-
-Tool execution results:
+        return "".join((
+            _FOLLOW_UP_QUERY, query,
+            _FOLLOW_UP_REASONING, previous_reasoning,
+            _FOLLOW_UP_RESULTS, results_section,
+            _FOLLOW_UP_SUFFIX
+        ))
+    
+    @staticmethod
+    def create_precomputed_prompt(query: str, tool_results: Dict[str, Any]) -> str:
+        """
+        Create a query that carries tool results computed before the first LLM call.
+        
+        Args:
+            query: Original query
+            tool_results: Results from tools detected directly in the query
+            
+        Returns:
+            str: Query text including the precomputed tool results
+        """
+        results_section = "\n".join([
+            f"- {tool}: {result}" for tool, result in tool_results.items()
+        ])
+        
+        prompt = f"""PRECOMPUTED_TOOL_RESULTS:
 {results_section}
 
-Now provide the final answer based on your reasoning and the tool results:
+QUERY: {query}
 
-FINAL_ANSWER:
-[Combine your reasoning with tool results to provide the complete answer]
-"""
+These tool results are already computed - use them directly in your reasoning and final answer.
+Only list additional tools in TOOLS_NEEDED if they are still required to answer the query."""
         return prompt
     
     @staticmethod
@@ -110,6 +196,12 @@ FINAL_ANSWER:
         Returns:
             Dict containing extracted components
         """
+        # The sections always come in this order, so one match splits the response
+        match = _SECTIONS_RE.search(response)
+        if match:
+            return {key: _join_lines(text) for key, text in match.groupdict().items()}
+        
+        # Missing or out-of-order sections: scan line by line
         components = {
             'reasoning': '',
             'tools_needed': '',
@@ -122,15 +214,15 @@ FINAL_ANSWER:
         for line in lines:
             line = line.strip()
             
-            if line.startswith('REASONING:'):
+            if line.startswith(REASONING_MARKER):
                 current_section = 'reasoning'
-                components['reasoning'] = line.replace('REASONING:', '').strip()
-            elif line.startswith('TOOLS_NEEDED:'):
+                components['reasoning'] = line.replace(REASONING_MARKER, '').strip()
+            elif line.startswith(TOOLS_NEEDED_MARKER):
                 current_section = 'tools_needed'
-                components['tools_needed'] = line.replace('TOOLS_NEEDED:', '').strip()
-            elif line.startswith('FINAL_ANSWER:'):
+                components['tools_needed'] = line.replace(TOOLS_NEEDED_MARKER, '').strip()
+            elif line.startswith(FINAL_ANSWER_MARKER):
                 current_section = 'final_answer'
-                components['final_answer'] = line.replace('FINAL_ANSWER:', '').strip()
+                components['final_answer'] = line.replace(FINAL_ANSWER_MARKER, '').strip()
             elif current_section and line:
                 components[current_section] += ' ' + line
         
@@ -151,8 +243,7 @@ FINAL_ANSWER:
         Returns:
             bool: True if structure is valid
         """
-        required_sections = ['REASONING:', 'TOOLS_NEEDED:', 'FINAL_ANSWER:']
-        return all(section in response for section in required_sections)
+        return all(section in response for section in _SECTIONS)
 
 
 class ReasoningChain:
@@ -200,7 +291,16 @@ class ReasoningChain:
         Returns:
             List of steps requiring tools
         """
-        return [step for step in self.steps if step.requires_tool]
+        return list(self.iter_tool_requiring_steps())
+    
+    def iter_tool_requiring_steps(self) -> Iterator[ReasoningStep]:
+        """
+        Iterate over steps that require tool execution without building a list.
+        
+        Returns:
+            Iterator of steps requiring tools
+        """
+        return (step for step in self.steps if step.requires_tool)
     
     def is_complete(self) -> bool:
         """
@@ -209,8 +309,8 @@ class ReasoningChain:
         Returns:
             bool: True if all tools have been executed
         """
-        tool_steps = self.get_tool_requiring_steps()
-        return all(step.result is not None for step in tool_steps)
+        # Single pass that stops at the first pending tool step
+        return not any(step.requires_tool and step.result is None for step in self.steps)
     
     def format_summary(self) -> str:
         """
@@ -219,16 +319,16 @@ class ReasoningChain:
         Returns:
             str: Formatted summary
         """
-        summary = "Reasoning Chain Summary:\n"
-        summary += "=" * 30 + "\n"
+        # Collect pieces and join once so long chains build in linear time
+        parts = ["Reasoning Chain Summary:\n", "=" * 30 + "\n"]
         
         for step in self.steps:
-            summary += f"\n{step.step_number}. {step.description}\n"
+            parts.append(f"\n{step.step_number}. {step.description}\n")
             if step.requires_tool:
-                summary += f"   Tool: {step.tool_call}\n"
+                parts.append(f"   Tool: {step.tool_call}\n")
                 if step.result is not None:
-                    summary += f"   Result: {step.result}\n"
+                    parts.append(f"   Result: {step.result}\n")
                 else:
-                    summary += f"   Result: [Pending]\n"
+                    parts.append("   Result: [Pending]\n")
         
-        return summary 
\ No newline at end of file
+        return "".join(parts) 
\ No newline at end of file
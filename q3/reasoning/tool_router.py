@@ -5,16 +5,87 @@ Maps string-based function calls to actual Python functions.
 
 import re
 import ast
-from typing import Dict, Any, List, Callable, Optional
+import copy
+import asyncio
+import importlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Callable, Optional, Tuple, Union
 from dataclasses import dataclass
 
-# Import all available tools
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from .chain_of_thought import TOOLS_NEEDED_MARKER, FINAL_ANSWER_MARKER
 
-from tools.math_tools import calculate_average, square_root, basic_calculator, compare_numbers
-from tools.string_tools import count_vowels, count_letters, count_consonants, analyze_string
+
+# The tools package sits next to this one, both when imported as q3.reasoning and as a
+# top-level reasoning package (main.py), so resolve it relative to our own package
+_TOOLS_PACKAGE = __package__.rpartition('.')[0]
+_MATH_TOOLS = f"{_TOOLS_PACKAGE}.tools.math_tools".lstrip('.')
+_STRING_TOOLS = f"{_TOOLS_PACKAGE}.tools.string_tools".lstrip('.')
+
+
+@lru_cache(maxsize=None)
+def _load_tool(module_name: str, attr: str) -> Callable:
+    """Import a tool function on first use; later lookups hit the cache."""
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# Tool call patterns, compiled once
+_CALL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*\s*\([^)]*\))')
+_FUNC_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*\((.*)\)', re.DOTALL)
+
+# Tools whose output depends only on their arguments, so results can be cached
+_PURE_TOOLS = frozenset({
+    'calculate_average', 'square_root', 'basic_calculator', 'compare_numbers',
+    'count_vowels', 'count_letters', 'count_consonants', 'analyze_string'
+})
+
+
+def _canonicalize(value: Any) -> Any:
+    """Turn tool parameters into a hashable form; equal numbers (18 and 18.0) already share a key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonicalize(item) for item in value)
+    return value
+
+
+def _literal_or_text(part: str) -> Any:
+    """Parse a single argument as a Python literal, falling back to its stripped text."""
+    part = part.strip()
+    try:
+        return ast.literal_eval(part)
+    except (SyntaxError, ValueError, TypeError, RecursionError):
+        return part
+
+
+# The TOOLS_NEEDED section, running up to a FINAL_ANSWER line; markers only count at line
+# start, and a FINAL_ANSWER line seen first means there is no tools section
+_TOOLS_SECTION_RE = re.compile(
+    rf"^[^\S\n]*(?:{FINAL_ANSWER_MARKER}"
+    rf"|{TOOLS_NEEDED_MARKER}(?P<tools>.*?)(?:^[^\S\n]*{FINAL_ANSWER_MARKER}|\Z))",
+    re.DOTALL | re.MULTILINE
+)
+
+# Patterns for tool calls that are obvious from the raw query, so they can run before the LLM call.
+# A number must end at a real boundary, so thousands separators ("1,200") and exponents
+# ("1e6") don't match a prefix of it and are left to the LLM instead
+_NUMBER = r'-?\d+(?:\.\d+)?(?![\d.,eE]*\d)'
+_NUMBER_RE = re.compile(_NUMBER)
+_LIST_SEP = r'(?:\s*,\s*|\s*,?\s*and\s+)'
+_AVERAGE_RE = re.compile(
+    rf'average of\s+({_NUMBER}(?:{_LIST_SEP}{_NUMBER})+)(?!{_LIST_SEP}-?\d)',
+    re.IGNORECASE
+)
+_SQUARE_ROOT_RE = re.compile(rf'square root of\s+({_NUMBER})', re.IGNORECASE)
+# The closing quote must not be followed by a word character, so "'don't'" isn't cut at the apostrophe
+_COUNT_RE = re.compile(
+    r'\b(vowels|consonants|letters)\s+(?:are\s+)?in\s+(?:the\s+(?:word|string|text)\s+)?(["\'])(.+?)\2(?!\w)',
+    re.IGNORECASE
+)
+_COUNT_TOOLS = {
+    'vowels': 'count_vowels',
+    'consonants': 'count_consonants',
+    'letters': 'count_letters'
+}
 
 
 @dataclass
@@ -23,6 +94,10 @@ class ToolCall:
     function_name: str
     parameters: List[Any]
     raw_call: str = ""
+    
+    def signature(self) -> Tuple:
+        """Hashable identity of the call; equal numbers compare equal whether int or float."""
+        return (self.function_name, _canonicalize(self.parameters))
 
 
 @dataclass  
@@ -39,19 +114,53 @@ class ToolRegistry:
     
     def __init__(self):
         """Initialize the tool registry with all available functions"""
-        self.tools: Dict[str, Callable] = {
-            'calculate_average': calculate_average,
-            'square_root': square_root,
-            'basic_calculator': basic_calculator,
-            'compare_numbers': compare_numbers,
-            'count_vowels': count_vowels,
-            'count_letters': count_letters,
-            'count_consonants': count_consonants,
-            'analyze_string': analyze_string
+        # Tools are (module, function) specs resolved on first use, so importing the
+        # router loads no tool module and a math-only call never loads string_tools;
+        # plain callables are accepted too
+        self.tools: Dict[str, Union[Tuple[str, str], Callable]] = {
+            'calculate_average': (_MATH_TOOLS, 'calculate_average'),
+            'square_root': (_MATH_TOOLS, 'square_root'),
+            'basic_calculator': (_MATH_TOOLS, 'basic_calculator'),
+            'compare_numbers': (_MATH_TOOLS, 'compare_numbers'),
+            'count_vowels': (_STRING_TOOLS, 'count_vowels'),
+            'count_letters': (_STRING_TOOLS, 'count_letters'),
+            'count_consonants': (_STRING_TOOLS, 'count_consonants'),
+            'analyze_string': (_STRING_TOOLS, 'analyze_string')
         }
+        self._tool_descriptions: Optional[List[str]] = None
+    
+    @property
+    def tool_descriptions(self) -> List[str]:
+        """Tool descriptions, built from the tools' docstrings (loading every tool) the first time they're needed."""
+        if self._tool_descriptions is None:
+            self.rebuild_descriptions()
+        return self._tool_descriptions
+    
+    def rebuild_descriptions(self) -> None:
+        """Recompute tool descriptions; call this after changing self.tools."""
+        descriptions = []
+        # Sorted so the rendered tool list is identical however the registry was built
+        for name in sorted(self.tools):
+            func = self.get_function(name)
+            doc = func.__doc__ or f"{name}(...)"
+            # Find the first non-empty line that looks like a description
+            lines = doc.split('\n')
+            description = ""
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith('Args:') and not line.startswith('Returns:'):
+                    description = line
+                    break
+            if not description:
+                description = f"{name}(...)"
+            descriptions.append(f"{name}: {description}")
+        self._tool_descriptions = descriptions
     
     def get_function(self, name: str) -> Optional[Callable]:
-        return self.tools.get(name)
+        entry = self.tools.get(name)
+        if entry is None or callable(entry):
+            return entry
+        return _load_tool(*entry)
     
     def list_tools(self) -> List[str]:
         return list(self.tools.keys())
@@ -63,65 +172,41 @@ class ToolCallParser:
     @staticmethod
     def extract_tool_calls(text: str) -> List[str]:
         """Extract tool calls from text using regex patterns."""
-        pattern = r'([a-zA-Z_][a-zA-Z0-9_]*\s*\([^)]*\))'
-        matches = re.findall(pattern, text)
-        return matches
+        return _CALL_RE.findall(text)
     
     @staticmethod
     def parse_function_call(call_str: str) -> ToolCall:
         """Parse a single function call string into components."""
         call_str = call_str.strip()
         
-        match = re.match(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*\((.*)\)', call_str)
+        match = _FUNC_RE.match(call_str)
         if not match:
             return ToolCall(function_name="", parameters=[], raw_call=call_str)
         
         function_name = match.group(1)
         params_str = match.group(2).strip()
         
-        parameters = []
-        if params_str:
-            try:
-                # Simple parameter parsing
-                if params_str.startswith('[') and params_str.endswith(']'):
-                    # Handle list parameter
-                    inner = params_str[1:-1]
-                    if inner:
-                        items = [float(x.strip()) for x in inner.split(',')]
-                        parameters = [items]
-                elif ',' in params_str:
-                    # Multiple parameters
-                    parts = params_str.split(',')
-                    for part in parts:
-                        part = part.strip()
-                        if part.startswith('"') and part.endswith('"'):
-                            parameters.append(part[1:-1])
-                        elif part.startswith("'") and part.endswith("'"):
-                            parameters.append(part[1:-1])
-                        else:
-                            try:
-                                parameters.append(float(part))
-                            except:
-                                parameters.append(part)
-                else:
-                    # Single parameter
-                    if params_str.startswith('"') and params_str.endswith('"'):
-                        parameters.append(params_str[1:-1])
-                    elif params_str.startswith("'") and params_str.endswith("'"):
-                        parameters.append(params_str[1:-1])
-                    else:
-                        try:
-                            parameters.append(float(params_str))
-                        except:
-                            parameters.append(params_str)
-            except Exception:
-                parameters = [params_str]
+        parameters = ToolCallParser.parse_parameters(params_str) if params_str else []
         
         return ToolCall(
             function_name=function_name,
             parameters=parameters,
             raw_call=call_str
         )
+    
+    @staticmethod
+    def parse_parameters(params_str: str) -> List[Any]:
+        """Parse a call's argument list into Python values."""
+        try:
+            call = ast.parse(f"__f__({params_str})", mode='eval').body
+            if not call.keywords:
+                return [ast.literal_eval(arg) for arg in call.args]
+        except (SyntaxError, ValueError, TypeError, RecursionError):
+            pass
+        
+        # Not all valid literals (e.g. an unquoted word or operator): split on commas
+        # and keep anything that isn't a literal as plain text
+        return [_literal_or_text(part) for part in params_str.split(',')]
 
 
 class ToolRouter:
@@ -131,6 +216,11 @@ class ToolRouter:
         """Initialize tool router with registry and parser"""
         self.registry = ToolRegistry()
         self.parser = ToolCallParser()
+        
+        # LRU cache of successful pure tool results
+        self._cache: "OrderedDict[Tuple, ToolResult]" = OrderedDict()
+        self._cache_max = 1024
+        self._cache_lock = threading.Lock()
     
     def parse_tools_from_response(self, llm_response: str) -> List[ToolCall]:
         """Parse tool calls from LLM response."""
@@ -149,8 +239,92 @@ class ToolRouter:
         
         return tool_calls
     
+    def detect_tool_calls(self, query: str) -> List[ToolCall]:
+        """Detect tool calls that are obvious from the raw query, without asking the LLM."""
+        tool_calls = []
+        
+        for match in _AVERAGE_RE.finditer(query):
+            numbers = [float(n) for n in _NUMBER_RE.findall(match.group(1))]
+            tool_calls.append(ToolCall('calculate_average', [numbers], match.group(0)))
+        
+        for match in _SQUARE_ROOT_RE.finditer(query):
+            tool_calls.append(ToolCall('square_root', [float(match.group(1))], match.group(0)))
+        
+        for match in _COUNT_RE.finditer(query):
+            function_name = _COUNT_TOOLS[match.group(1).lower()]
+            tool_calls.append(ToolCall(function_name, [match.group(3)], match.group(0)))
+        
+        return tool_calls
+    
     def execute_tool_call(self, tool_call: ToolCall) -> ToolResult:
-        """Execute a single tool call."""
+        """Execute a single tool call, reusing cached results for pure tools."""
+        key = self._cache_key(tool_call)
+        if key is not None:
+            with self._cache_lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is not None:
+                return ToolResult(
+                    tool_call=tool_call,
+                    success=True,
+                    result=copy.copy(cached.result)
+                )
+        
+        result = self._run_tool_call(tool_call)
+        
+        if key is not None and result.success:
+            self._store_cached(key, result)
+            result = ToolResult(
+                tool_call=tool_call,
+                success=True,
+                result=copy.copy(result.result)
+            )
+        
+        return result
+    
+    def _store_cached(self, key: Tuple, result: ToolResult) -> None:
+        """Add a successful result to the LRU cache, evicting the oldest entry if full."""
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > self._cache_max:
+                self._cache.popitem(last=False)
+    
+    def _batch_string_analyses(self, tool_calls: List[ToolCall]) -> None:
+        """Run uncached analyze_string calls through one batched pass, filling the cache."""
+        pending = {}
+        for tool_call in tool_calls:
+            if (tool_call.function_name == 'analyze_string'
+                    and len(tool_call.parameters) == 1
+                    and isinstance(tool_call.parameters[0], str)):
+                key = self._cache_key(tool_call)
+                with self._cache_lock:
+                    cached = key in self._cache
+                if not cached:
+                    pending[key] = tool_call
+        
+        if len(pending) < 2:
+            return
+        
+        analyze_string_batch = _load_tool(_STRING_TOOLS, 'analyze_string_batch')
+        texts = [tool_call.parameters[0] for tool_call in pending.values()]
+        for (key, tool_call), analysis in zip(pending.items(), analyze_string_batch(texts)):
+            self._store_cached(key, ToolResult(tool_call=tool_call, success=True, result=analysis))
+    
+    def _cache_key(self, tool_call: ToolCall) -> Optional[Tuple]:
+        """Build the result cache key for a tool call, or None if it can't be cached."""
+        if tool_call.function_name not in _PURE_TOOLS:
+            return None
+        
+        key = tool_call.signature()
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def _run_tool_call(self, tool_call: ToolCall) -> ToolResult:
+        """Execute a single tool call without consulting the cache."""
         func = self.registry.get_function(tool_call.function_name)
         if not func:
             return ToolResult(
@@ -175,48 +349,46 @@ class ToolRouter:
     
     def execute_all_tools(self, tool_calls: List[ToolCall]) -> Dict[str, ToolResult]:
         """Execute all tool calls and return results."""
-        results = {}
-        for i, tool_call in enumerate(tool_calls):
-            result = self.execute_tool_call(tool_call)
-            key = f"{tool_call.function_name}_{i}" if len(tool_calls) > 1 else tool_call.function_name
-            results[key] = result
+        # Several string analyses are cheaper as one vectorized batch; execute_tool_call
+        # then picks their results up from the cache
+        self._batch_string_analyses(tool_calls)
         
-        return results
+        # The tools are quick pure-Python calls, so running them in order beats any
+        # event loop or thread hand-off; execute_all_tools_async is there for async callers
+        return {
+            self._result_key(tool_call, i, len(tool_calls)): self.execute_tool_call(tool_call)
+            for i, tool_call in enumerate(tool_calls)
+        }
+    
+    async def execute_all_tools_async(self, tool_calls: List[ToolCall]) -> Dict[str, ToolResult]:
+        """Execute independent tool calls concurrently and return results in call order."""
+        # Several string analyses are cheaper as one vectorized batch; execute_tool_call
+        # then picks their results up from the cache. The batch is blocking NumPy work,
+        # so it runs off the event loop like the tools themselves
+        await asyncio.to_thread(self._batch_string_analyses, tool_calls)
+        
+        results = await asyncio.gather(*[
+            asyncio.to_thread(self.execute_tool_call, tool_call) for tool_call in tool_calls
+        ])
+        return {
+            self._result_key(tool_call, i, len(tool_calls)): result
+            for i, (tool_call, result) in enumerate(zip(tool_calls, results))
+        }
+    
+    @staticmethod
+    def _result_key(tool_call: ToolCall, index: int, total: int) -> str:
+        """Name a tool result, numbering them when there is more than one call."""
+        return f"{tool_call.function_name}_{index}" if total > 1 else tool_call.function_name
     
     def get_available_tools(self) -> List[str]:
         """Get list of available tools with descriptions"""
-        descriptions = []
-        for name, func in self.registry.tools.items():
-            doc = func.__doc__ or f"{name}(...)"
-            # Find the first non-empty line that looks like a description
-            lines = doc.split('\n')
-            description = ""
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('Args:') and not line.startswith('Returns:'):
-                    description = line
-                    break
-            if not description:
-                description = f"{name}(...)"
-            descriptions.append(f"{name}: {description}")
-        return descriptions
+        return list(self.registry.tool_descriptions)
     
     def _extract_tools_section(self, response: str) -> str:
         """Extract the TOOLS_NEEDED section from LLM response."""
-        lines = response.split('\n')
-        in_tools_section = False
-        tools_content = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('TOOLS_NEEDED:'):
-                in_tools_section = True
-                content = line.replace('TOOLS_NEEDED:', '').strip()
-                if content:
-                    tools_content.append(content)
-            elif line.startswith('FINAL_ANSWER:'):
-                break
-            elif in_tools_section and line:
-                tools_content.append(line)
-        
-        return ' '.join(tools_content) 
\ No newline at end of file
+        match = _TOOLS_SECTION_RE.search(response)
+        if not match or match.group('tools') is None:
+            return ""
+        
+        section = match.group('tools')
+        return ' '.join(line.strip() for line in section.split('\n') if line.strip()) 
\ No newline at end of file
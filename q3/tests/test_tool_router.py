@@ -0,0 +1,39 @@
+"""
+Tests for detecting obvious tool calls straight from the user's query.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reasoning.tool_router import ToolRouter
+
+
+def _detected(query):
+    return [(call.function_name, call.parameters) for call in ToolRouter().detect_tool_calls(query)]
+
+
+def test_detects_plain_average_and_square_root():
+    assert _detected("What is the average of 10, 20 and 30.5?") == [
+        ('calculate_average', [[10.0, 20.0, 30.5]])
+    ]
+    assert _detected("Find the square root of 144.") == [('square_root', [144.0])]
+
+
+def test_skips_numbers_with_thousands_separators():
+    assert _detected("What is the average of 1,200 and 3,400?") == []
+    assert _detected("What is the average of 1, 2 and 3,400?") == []
+
+
+def test_skips_numbers_with_exponents():
+    assert _detected("What is the square root of 1e6?") == []
+    assert _detected("What is the square root of 2.5E3?") == []
+
+
+def test_detects_quoted_text():
+    assert _detected('How many vowels are in "Multimodality"?') == [('count_vowels', ['Multimodality'])]
+
+
+def test_quoted_text_keeps_inner_apostrophes():
+    assert _detected("How many letters are in 'don't'?") == [('count_letters', ["don't"])]
@@ -3,7 +3,18 @@ Tools package for the tool-enhanced reasoning script.
 Contains math and string processing tools.
 """
 
-from .math_tools import *
-from .string_tools import *
+import importlib
 
-__all__ = ['math_tools', 'string_tools'] 
\ No newline at end of file
+__all__ = ['math_tools', 'string_tools']
+
+
+def __getattr__(name):
+    """Import tool modules, and the tools they define, only when first accessed."""
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    if not name.startswith('_'):
+        for module_name in __all__:
+            module = importlib.import_module(f".{module_name}", __name__)
+            if hasattr(module, name):
+                return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,10 +3,55 @@ Math tools for numerical computations and comparisons.
 Used by the LLM to perform mathematical operations when reasoning.
 """
 
+import ast
 import math
+import operator
+from functools import lru_cache
 from typing import List, Union, Any
 
 
+# Comparison operators accepted by compare_numbers
+_COMPARISONS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# Arithmetic allowed in basic_calculator expressions
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow
+}
+_UNARY_OPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos
+}
+
+
+@lru_cache(maxsize=1024)
+def _parse_expression(expression: str) -> ast.expr:
+    """Parse an arithmetic expression once; repeated expressions reuse the tree."""
+    return ast.parse(expression, mode='eval').body
+
+
+def _evaluate(node: ast.expr) -> Union[int, float]:
+    """Evaluate a parsed arithmetic expression, rejecting anything but numbers and operators."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        return _BINARY_OPS[type(node.op)](_evaluate(node.left), _evaluate(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_evaluate(node.operand))
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
 def calculate_average(numbers: List[Union[int, float]]) -> float:
     """
     Calculate the arithmetic average of a list of numbers.
@@ -64,9 +109,7 @@ def basic_calculator(expression: str) -> Union[int, float]:
         raise ValueError("Invalid characters in expression")
     
     try:
-        # Use eval safely with restricted globals
-        result = eval(expression, {"__builtins__": {}}, {})
-        return result
+        return _evaluate(_parse_expression(expression.strip()))
     except Exception as e:
         raise ValueError(f"Cannot evaluate expression: {e}")
 
@@ -86,19 +129,11 @@ def compare_numbers(a: Union[int, float], b: Union[int, float], operator: str) -
     Example:
         compare_numbers(7, 4, '>') -> True
     """
-    operators = {
-        '>': lambda x, y: x > y,
-        '<': lambda x, y: x < y,
-        '>=': lambda x, y: x >= y,
-        '<=': lambda x, y: x <= y,
-        '==': lambda x, y: x == y,
-        '!=': lambda x, y: x != y
-    }
-    
-    if operator not in operators:
+    compare = _COMPARISONS.get(operator)
+    if compare is None:
         raise ValueError(f"Invalid operator: {operator}")
     
-    return operators[operator](a, b)
+    return compare(a, b)
 
 
 def power(base: Union[int, float], exponent: Union[int, float]) -> float:
@@ -4,7 +4,98 @@ Used by the LLM to analyze text and count various characters.
 """
 
 import re
-from typing import Dict, List
+from collections import Counter
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Vowel sets shared by the counting tools; 'y' is a vowel or consonant depending on the caller
+_VOWELS = frozenset('aeiouAEIOU')
+_VOWELS_Y = _VOWELS | frozenset('yY')
+
+# Character class bit flags used by analyze_string
+_LETTER = 1
+_VOWEL = 2
+_UPPER = 4
+_LOWER = 8
+_DIGIT = 16
+_PUNCT = 32
+
+_ANALYSIS_KEYS = (
+    'total_chars', 'letters', 'vowels', 'consonants', 'words',
+    'uppercase', 'lowercase', 'digits', 'spaces', 'punctuation'
+)
+
+
+def _classify_char(char: str) -> int:
+    """Get the class flags for a single character."""
+    flags = 0
+    if char.isalpha():
+        flags |= _LETTER
+        if char in _VOWELS:
+            flags |= _VOWEL
+    if char.isupper():
+        flags |= _UPPER
+    if char.islower():
+        flags |= _LOWER
+    if char.isdigit():
+        flags |= _DIGIT
+    if not char.isalnum() and not char.isspace():
+        flags |= _PUNCT
+    return flags
+
+
+# Class flags for every ASCII byte, usable as a bytes.translate table
+_CLASS_LUT = bytes(_classify_char(chr(i)) if i < 128 else 0 for i in range(256))
+
+
+def _count_classes(class_counts: Dict[int, int]) -> Dict[str, int]:
+    """Turn counts per class-flag combination into per-class counts."""
+    counts = dict.fromkeys(('letters', 'vowels', 'uppercase', 'lowercase', 'digits', 'punctuation'), 0)
+    for flags, n in class_counts.items():
+        if flags & _LETTER:
+            counts['letters'] += n
+        if flags & _VOWEL:
+            counts['vowels'] += n
+        if flags & _UPPER:
+            counts['uppercase'] += n
+        if flags & _LOWER:
+            counts['lowercase'] += n
+        if flags & _DIGIT:
+            counts['digits'] += n
+        if flags & _PUNCT:
+            counts['punctuation'] += n
+    counts['consonants'] = counts['letters'] - counts['vowels']
+    return counts
+
+
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+
+# Below this length the NumPy conversion costs more than it saves
+_NUMPY_MIN_LENGTH = 256
+
+# Below these lengths a plain generator over the characters beats the setup cost of
+# one str.count pass per vowel, or of building a Counter of distinct characters
+_STR_COUNT_MIN_LENGTH = 48
+_COUNTER_MIN_LENGTH = 256
+
+if np is not None:
+    _CLASS_LUT_ARR = np.frombuffer(_CLASS_LUT, dtype=np.uint8)
+    _LETTER_MASK = (_CLASS_LUT_ARR & _LETTER).astype(bool)
+    _VOWEL_MASK = (_CLASS_LUT_ARR & _VOWEL).astype(bool)
+    _Y_MASK = np.zeros(256, dtype=bool)
+    _Y_MASK[[ord('y'), ord('Y')]] = True
+
+
+def _ascii_array(text: str) -> Optional["np.ndarray"]:
+    """Get a uint8 view of long ASCII text for vectorized counting, or None to use the Python path."""
+    if np is None or len(text) < _NUMPY_MIN_LENGTH or not text.isascii():
+        return None
+    return np.frombuffer(text.encode('ascii'), dtype=np.uint8)
 
 
 def count_vowels(text: str, include_y: bool = False) -> int:
@@ -22,11 +113,17 @@ def count_vowels(text: str, include_y: bool = False) -> int:
         count_vowels("Multimodality") -> 6 (u, i, o, a, i, y not counted)
         count_vowels("Multimodality", include_y=True) -> 7
     """
-    vowels = "aeiouAEIOU"
-    if include_y:
-        vowels += "yY"
+    vowels = _VOWELS_Y if include_y else _VOWELS
+    if len(text) < _STR_COUNT_MIN_LENGTH:
+        return sum(1 for char in text if char in vowels)
+    
+    arr = _ascii_array(text)
+    if arr is not None:
+        mask = _VOWEL_MASK | _Y_MASK if include_y else _VOWEL_MASK
+        return int(mask[arr].sum())
     
-    return sum(1 for char in text if char in vowels)
+    # str.count scans in C, so a pass per vowel beats a Python loop per character
+    return sum(map(text.count, vowels))
 
 
 def count_letters(text: str) -> int:
@@ -43,7 +140,15 @@ def count_letters(text: str) -> int:
         count_letters("machine") -> 7
         count_letters("hello, world!") -> 10
     """
-    return sum(1 for char in text if char.isalpha())
+    if len(text) < _COUNTER_MIN_LENGTH:
+        return sum(1 for char in text if char.isalpha())
+    
+    arr = _ascii_array(text)
+    if arr is not None:
+        return int(_LETTER_MASK[arr].sum())
+    
+    # Classify each distinct character once instead of every occurrence
+    return sum(n for char, n in Counter(text).items() if char.isalpha())
 
 
 def count_consonants(text: str, include_y: bool = True) -> int:
@@ -60,11 +165,18 @@ def count_consonants(text: str, include_y: bool = True) -> int:
     Example:
         count_consonants("machine") -> 4 (m, c, h, n)
     """
-    vowels = "aeiouAEIOU"
-    if not include_y:
-        vowels += "yY"
+    vowels = _VOWELS if include_y else _VOWELS_Y
+    if len(text) < _COUNTER_MIN_LENGTH:
+        return sum(1 for char in text if char.isalpha() and char not in vowels)
     
-    return sum(1 for char in text if char.isalpha() and char not in vowels)
+    arr = _ascii_array(text)
+    if arr is not None:
+        mask = _LETTER_MASK & ~_VOWEL_MASK
+        if not include_y:
+            mask &= ~_Y_MASK
+        return int(mask[arr].sum())
+    
+    return sum(n for char, n in Counter(text).items() if char.isalpha() and char not in vowels)
 
 
 def count_words(text: str) -> int:
@@ -125,18 +237,71 @@ def analyze_string(text: str) -> Dict[str, int]:
             'lowercase': 12
         }
     """
-    return {
-        'total_chars': len(text),
-        'letters': count_letters(text),
-        'vowels': count_vowels(text),
-        'consonants': count_consonants(text),
-        'words': count_words(text),
-        'uppercase': sum(1 for char in text if char.isupper()),
-        'lowercase': sum(1 for char in text if char.islower()),
-        'digits': sum(1 for char in text if char.isdigit()),
-        'spaces': text.count(' '),
-        'punctuation': sum(1 for char in text if not char.isalnum() and not char.isspace())
-    }
+    arr = _ascii_array(text)
+    if arr is not None:
+        # Vectorized: look up every byte's class flags and histogram them
+        histogram = np.bincount(_CLASS_LUT_ARR[arr], minlength=64)
+        class_counts = {flags: int(n) for flags, n in enumerate(histogram) if n}
+    elif text.isascii():
+        # Map every byte to its class flags and tally the flags, both in C
+        class_counts = Counter(text.encode('ascii').translate(_CLASS_LUT))
+    else:
+        class_counts = Counter()
+        for char, n in Counter(text).items():
+            class_counts[_classify_char(char)] += n
+    
+    return _analysis_from_classes(text, class_counts)
+
+
+def analyze_string_batch(texts: List[str]) -> List[Dict[str, int]]:
+    """
+    Perform comprehensive analysis of several text strings at once.
+    
+    Args:
+        texts: Input texts to analyze
+        
+    Returns:
+        List[Dict[str, int]]: One analyze_string result per text, in order
+        
+    Example:
+        analyze_string_batch(["hi", "Yo!"]) -> [analyze_string("hi"), analyze_string("Yo!")]
+    """
+    if np is None:
+        return [analyze_string(text) for text in texts]
+    
+    results: List[Optional[Dict[str, int]]] = [None] * len(texts)
+    
+    # Classify all ASCII texts in one vectorized pass: tag each byte with its text's
+    # index so a single bincount yields a 64-bin class histogram per text
+    ascii_indices = [i for i, text in enumerate(texts) if text.isascii()]
+    if ascii_indices:
+        arr = np.frombuffer(''.join(texts[i] for i in ascii_indices).encode('ascii'), dtype=np.uint8)
+        segments = np.repeat(
+            np.arange(len(ascii_indices)),
+            [len(texts[i]) for i in ascii_indices]
+        )
+        histograms = np.bincount(
+            segments * 64 + _CLASS_LUT_ARR[arr],
+            minlength=len(ascii_indices) * 64
+        ).reshape(-1, 64)
+        
+        for i, histogram in zip(ascii_indices, histograms):
+            class_counts = {flags: int(n) for flags, n in enumerate(histogram) if n}
+            results[i] = _analysis_from_classes(texts[i], class_counts)
+    
+    return [
+        result if result is not None else analyze_string(text)
+        for text, result in zip(texts, results)
+    ]
+
+
+def _analysis_from_classes(text: str, class_counts: Dict[int, int]) -> Dict[str, int]:
+    """Build the analyze_string result from a text's class-flag counts."""
+    counts = _count_classes(class_counts)
+    counts['total_chars'] = len(text)
+    counts['words'] = count_words(text)
+    counts['spaces'] = text.count(' ')
+    return {key: counts[key] for key in _ANALYSIS_KEYS}
 
 
 def find_longest_word(text: str) -> str:
@@ -173,6 +338,12 @@ def count_specific_char(text: str, char: str) -> int:
     Example:
         count_specific_char("hello", "l") -> 2
     """
+    if len(char) == 1 and char.isascii() and text.isascii():
+        # Count both cases directly rather than allocating a lowercased copy of text
+        if char.isalpha():
+            return text.count(char.lower()) + text.count(char.upper())
+        return text.count(char)
+    
     return text.lower().count(char.lower())
 
 
@@ -190,7 +361,9 @@ def is_palindrome(text: str) -> bool:
         is_palindrome("A man a plan a canal Panama") -> True
     """
     # Remove spaces and convert to lowercase for comparison
-    cleaned = re.sub(r'[^a-zA-Z0-9]', '', text.lower())
+    if not text.islower():
+        text = text.lower()
+    cleaned = _NON_ALNUM_RE.sub('', text)
     return cleaned == cleaned[::-1]
 
 